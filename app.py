@@ -19,7 +19,7 @@ with an Azure OpenAI deployment:
 AZURE_OPENAI_API_KEY
 AZURE_OPENAI_ENDPOINT
 AZURE_OPENAI_DEPLOYMENT
-AZURE_OPENAI_API_VERSION (optional, defaults to 2024-02-15-preview)
+AZURE_OPENAI_API_VERSION (optional, defaults to 2024-08-01-preview)
 ```
 
 It keeps the original transcript text intact while applying color-coded
@@ -28,19 +28,49 @@ highlights to the passages identified by the model.
 
 from __future__ import annotations
 
+import asyncio
+import copy
+import hashlib
 import json
 import os
+import queue
+import random
+import tempfile
 import threading
+import zipfile
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
 from tkinter import BOTH, END, LEFT, RIGHT, StringVar, Tk, Button, Frame, Label, Text, filedialog, messagebox, ttk
 
+import ahocorasick
+import httpx
 from docx import Document
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
+from docx.oxml.xmlchemy import BaseOxmlElement
+from docx.text.paragraph import Paragraph
 from dotenv import load_dotenv
-from openai import AzureOpenAI
+from lxml import etree
+from openai import APIConnectionError, APIStatusError, AsyncAzureOpenAI, RateLimitError
 from openai import OpenAIError
 
+try:
+    # Optional: a SIMD-compiled literal database beats the pure-Python-driven
+    # automaton scan by a wide margin where the hyperscan wheel is available.
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    # Optional: Rust-based parser, several times faster than the stdlib on
+    # the response payloads; both accept the encoded bytes we feed them.
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 
 load_dotenv()
 
@@ -82,12 +112,60 @@ CATEGORY_DETAILS = {
 }
 
 
+_QN_BODY = qn("w:body")
+_QN_HIGHLIGHT = qn("w:highlight")
+_QN_P = qn("w:p")
+_QN_SHD = qn("w:shd")
+_QN_T = qn("w:t")
+
+
+def _make_shd(color_hex: str) -> BaseOxmlElement:
+    shd = OxmlElement("w:shd")
+    shd.set(qn("w:val"), "clear")
+    shd.set(qn("w:fill"), color_hex)
+    return shd
+
+
+# One prebuilt <w:shd> element per category; apply_shading deepcopies these
+# instead of rebuilding the element and its qn() attribute names per run.
+_SHD_TEMPLATES = {code: _make_shd(meta["color"]) for code, meta in CATEGORY_DETAILS.items()}
+
+
+# Upper bound on simultaneous in-flight Azure requests.
+MAX_CONCURRENT_REQUESTS = 8
+
+# How many transcript chunks to pack into a single Azure request. Batching
+# amortizes the system prompt across chunks and spends fewer RPM quota units.
+CHUNKS_PER_REQUEST = 4
+
+# Streamed characters between progress log lines (~512 tokens).
+STREAM_LOG_INTERVAL = 2048
+
+# How often the Tk main loop drains queued log lines into the Text widget.
+LOG_DRAIN_INTERVAL_MS = 100
+
+# Quotes at least this long skip the automaton and are matched through the
+# paragraph trigram index instead.
+LONG_QUOTE_CHARS = 100
+
+# Azure throttles bursty traffic with 429s; retry transient failures with
+# capped exponential backoff before giving up on the whole run.
+MAX_RETRY_ATTEMPTS = 6
+MAX_RETRY_SLEEP = 60.0
+
+# Responses are deterministic (temperature=0), so repeat runs over the same
+# transcript can reuse cached model output instead of paying another call.
+CACHE_DIR = Path(__file__).with_name(".response_cache")
+
+
 SYSTEM_PROMPT = """You are an analyst that codes interview transcripts into the
-specified categories. Return JSON following this schema:
+specified categories. The transcript is delivered as one or more numbered
+chunks delimited by ===CHUNK n=== markers. Return JSON following this schema:
 
 {
   "matches": [
     {
+      "chunk_id": 0,
       "category": "A",
       "quotes": ["verbatim excerpt"]
     }
@@ -108,24 +186,114 @@ H. Additional Insights – Open reflections, emergent, or unanticipated themes.
 """
 
 
+# Strict structured-outputs schema: the service constrains sampling to this
+# shape, so categories are enum-valid and responses never need JSON repair.
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "matches",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "matches": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "chunk_id": {"type": "integer"},
+                            "category": {"type": "string", "enum": list(CATEGORY_DETAILS)},
+                            "quotes": {"type": "array", "items": {"type": "string"}},
+                        },
+                        "required": ["chunk_id", "category", "quotes"],
+                        "additionalProperties": False,
+                    },
+                }
+            },
+            "required": ["matches"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
 @dataclass
 class QuoteMatch:
     category: str
     quote: str
 
 
+class _StreamingMatchParser:
+    """Extract completed match objects from a streamed JSON response.
+
+    Tracks brace depth (string- and escape-aware) across arbitrary fragment
+    boundaries; each object closed at depth 2 is one entry of the top-level
+    ``matches`` array and is decoded as soon as its closing brace arrives.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._object_start: int | None = None
+
+    @property
+    def content(self) -> str:
+        return self._buffer
+
+    def feed(self, fragment: str) -> list[dict]:
+        start = len(self._buffer)
+        self._buffer += fragment
+
+        completed: list[dict] = []
+        for pos in range(start, len(self._buffer)):
+            char = self._buffer[pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+                if self._depth == 2:
+                    self._object_start = pos
+            elif char == "}":
+                if self._depth == 2 and self._object_start is not None:
+                    raw = self._buffer[self._object_start : pos + 1]
+                    try:
+                        completed.append(_json_loads(raw.encode("utf-8")))
+                    except json.JSONDecodeError as exc:  # noqa: BLE001
+                        raise ValueError(f"Model response was not valid JSON: {raw}") from exc
+                    self._object_start = None
+                self._depth -= 1
+        return completed
+
+
 class TranscriptCoderApp:
     def __init__(self, root: Tk) -> None:
         self.root = root
         self.root.title("Azure Oral Assessment Coder")
 
-        self.client = self._build_client()
+        # Fail fast on missing configuration; the client itself is built per
+        # run because its connection pool binds to that run's event loop.
+        self._validate_environment()
+        self.cache_enabled = True
 
         self.input_path = StringVar()
         self.output_path = StringVar()
 
         self._build_ui()
 
+        # Worker threads only enqueue log lines; the Tk main loop drains the
+        # queue, since Tk widgets are not safe to touch off-thread.
+        self._log_q: queue.SimpleQueue[str] = queue.SimpleQueue()
+        self.root.after(LOG_DRAIN_INTERVAL_MS, self._drain_log_queue)
+
     # ------------------------------------------------------------------ UI --
     def _build_ui(self) -> None:
         padding = {"padx": 10, "pady": 5}
@@ -186,90 +354,333 @@ class TranscriptCoderApp:
 
     # --------------------------------------------------------- Core logic --
     def _process_document(self) -> None:
+        try:
+            asyncio.run(self._process_document_async())
+        except Exception as exc:  # noqa: BLE001
+            messagebox.showerror("Processing failed", str(exc))
+            self._log(f"ERROR: {exc}")
+        finally:
+            self.process_button.config(state="normal")
+
+    async def _process_document_async(self) -> None:
+        # A fresh client per run: asyncio.run gives every button press its
+        # own event loop, and the pool's keep-alive connections are bound to
+        # the loop they were opened on.
+        self.client = self._build_client()
         try:
             self._log("Loading transcript...")
-            document = Document(self.input_path.get())
-            paragraphs = [p.text.strip() for p in document.paragraphs if p.text.strip()]
+            # Stream paragraph text straight out of the archive for the read
+            # phase; the full python-docx tree is only built once coding is
+            # done and the write phase needs it.
+            paragraphs = [
+                text
+                for raw in fast_read_paragraphs(self.input_path.get())
+                if (text := raw.strip())
+            ]
 
             if not paragraphs:
                 raise ValueError("No text found in the document.")
 
-            matches: list[QuoteMatch] = []
-            for chunk in chunk_text(paragraphs):
-                matches.extend(self._code_chunk(chunk))
-
-            if not matches:
-                self._log("No excerpts were returned by the model. Saving original document.")
-            else:
-                applied = self._apply_highlights(document, matches)
-                self._log(f"Applied {applied} highlight(s).")
+            # Bound concurrency so a long transcript cannot exhaust the
+            # deployment's rate limit. Recreated per run because asyncio
+            # primitives bind to the running event loop.
+            self._sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+            # Quotes already seen this run, so overlapping chunks cannot
+            # queue the same highlight work twice.
+            self._global_quote_set: set[tuple[str, str]] = set()
 
-            self._append_legend(document)
-
-            document.save(self.output_path.get())
-            self._log(f"Saved coded transcript to {self.output_path.get()}.")
-            messagebox.showinfo("Done", "Processing complete!")
-        except Exception as exc:  # noqa: BLE001
-            messagebox.showerror("Processing failed", str(exc))
-            self._log(f"ERROR: {exc}")
+            matches = await self._code_chunks_batched(chunk_text(paragraphs))
         finally:
-            self.process_button.config(state="normal")
+            await self.client.close()
+
+        document = Document(self.input_path.get())
+        if not matches:
+            self._log("No excerpts were returned by the model. Saving original document.")
+        else:
+            applied = self._apply_highlights(document, matches)
+            self._log(f"Applied {applied} highlight(s).")
+
+        self._append_legend(document)
+
+        document.save(self.output_path.get())
+        self._log(f"Saved coded transcript to {self.output_path.get()}.")
+        messagebox.showinfo("Done", "Processing complete!")
+
+    async def _code_chunks_batched(
+        self, chunks: Iterable[str], group: int = CHUNKS_PER_REQUEST
+    ) -> list[QuoteMatch]:
+        chunk_iter = iter(chunks)
+        payloads = []
+        while batch := list(islice(chunk_iter, group)):
+            payloads.append(
+                "\n".join(
+                    f"===CHUNK {index}===\n{chunk}" for index, chunk in enumerate(batch)
+                )
+            )
+        results = await asyncio.gather(
+            *(self._code_chunk(payload) for payload in payloads),
+            return_exceptions=True,
+        )
+
+        matches: list[QuoteMatch] = []
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+            matches.extend(result)
+        return matches
 
-    def _code_chunk(self, chunk: str) -> list[QuoteMatch]:
+    async def _code_chunk(self, chunk: str) -> list[QuoteMatch]:
         self._log(f"Coding chunk with {len(chunk)} characters...")
+
+        cache_path = CACHE_DIR / f"{self._cache_key(chunk)}.json" if self.cache_enabled else None
+        if cache_path is not None and cache_path.exists():
+            self._log("Chunk found in response cache; skipping Azure call.")
+            try:
+                return self._parse_matches(cache_path.read_text(encoding="utf-8"))
+            except (ValueError, KeyError, TypeError):
+                # A corrupt entry must not keep aborting runs until someone
+                # hunts down a SHA-named file; drop it and call Azure.
+                self._log("Cached response was unreadable; discarding it.")
+                cache_path.unlink(missing_ok=True)
+
         messages = [
             {"role": "system", "content": SYSTEM_PROMPT},
             {
                 "role": "user",
                 "content": (
-                    "Identify exact quotations from this transcript and map them "
-                    "to the categories. Only include verbatim matches. Transcript:\n\n"
+                    "Identify exact quotations from the transcript chunks below and "
+                    "map them to the categories, tagging each match with its "
+                    "chunk_id. Only include verbatim matches. Transcript chunks:\n\n"
                     + chunk
                 ),
             },
         ]
+        for attempt in range(MAX_RETRY_ATTEMPTS):
+            # Reset per attempt: a failure mid-stream leaves partial state.
+            # Quote keys stay in the attempt-local pending set until the
+            # stream completes, so a retried attempt can re-emit them.
+            parser = _StreamingMatchParser()
+            matches: list[QuoteMatch] = []
+            pending: set[tuple[str, str]] = set()
+            next_progress_log = STREAM_LOG_INTERVAL
+            try:
+                async with self._sem:
+                    stream = await self.client.chat.completions.create(
+                        model=os.environ["AZURE_OPENAI_DEPLOYMENT"],
+                        temperature=0,
+                        response_format=RESPONSE_FORMAT,
+                        messages=messages,
+                        stream=True,
+                    )
+                    async for event in stream:
+                        if not event.choices:
+                            continue
+                        delta = event.choices[0].delta.content
+                        if not delta:
+                            continue
+                        for item in parser.feed(delta):
+                            matches.extend(self._matches_from_item(item, pending))
+                        if len(parser.content) >= next_progress_log:
+                            self._log(f"Streaming response... {len(matches)} match(es) so far.")
+                            next_progress_log += STREAM_LOG_INTERVAL
+                # A stream cut short (max-token or content-filter stop) leaves
+                # an incomplete buffer; fail like the blocking path did rather
+                # than return — and cache — a partial set of matches.
+                try:
+                    _json_loads(parser.content.encode("utf-8"))
+                except json.JSONDecodeError as exc:  # noqa: BLE001
+                    raise ValueError(
+                        f"Model response was not valid JSON: {parser.content}"
+                    ) from exc
+                break
+            except OpenAIError as exc:
+                if attempt + 1 < MAX_RETRY_ATTEMPTS and _is_retryable_error(exc):
+                    delay = _retry_delay(exc, attempt)
+                    self._log(
+                        f"Azure call failed ({type(exc).__name__}); "
+                        f"retrying in {delay:.1f} s..."
+                    )
+                    await asyncio.sleep(delay)
+                    continue
+                raise RuntimeError(
+                    "Azure OpenAI call failed. Please confirm your endpoint, "
+                    "deployment name, API version, and key."
+                ) from exc
+        self._global_quote_set |= pending
+        if cache_path is not None:
+            self._cache_store(cache_path, parser.content)
+        self._log(f"Received {len(matches)} matches.")
+        return matches
+
+    @staticmethod
+    def _cache_key(chunk: str) -> str:
+        payload = json.dumps(
+            {
+                "model": os.environ["AZURE_OPENAI_DEPLOYMENT"],
+                "system": SYSTEM_PROMPT,
+                "response_format": RESPONSE_FORMAT,
+                "chunk": chunk,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _cache_store(cache_path: Path, content: str) -> None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write via a tempfile + os.replace so a crash never leaves a
+        # truncated cache entry behind.
+        fd, tmp_name = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
         try:
-            response = self.client.chat.completions.create(
-                model=os.environ["AZURE_OPENAI_DEPLOYMENT"],
-                temperature=0,
-                response_format={"type": "json_object"},
-                messages=messages,
-            )
-        except OpenAIError as exc:
-            raise RuntimeError(
-                "Azure OpenAI call failed. Please confirm your endpoint, "
-                "deployment name, API version, and key."
-            ) from exc
-        content = response.choices[0].message.content
-        try:
-            parsed = json.loads(content)
-        except json.JSONDecodeError as exc:  # noqa: BLE001
-            raise ValueError(f"Model response was not valid JSON: {content}") from exc
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                handle.write(content)
+            os.replace(tmp_name, cache_path)
+        except OSError:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+    def _parse_matches(self, content: str) -> list[QuoteMatch]:
+        pending: set[tuple[str, str]] = set()
+        matches = []
+        for item in _json_loads(content.encode("utf-8"))["matches"]:
+            matches.extend(self._matches_from_item(item, pending))
+        self._global_quote_set |= pending
+        self._log(f"Received {len(matches)} matches.")
+        return matches
 
+    def _matches_from_item(self, item: dict, pending: set[tuple[str, str]]) -> list[QuoteMatch]:
+        # The strict schema guarantees the category is one of our codes.
+        category = item["category"]
         matches = []
-        for item in parsed.get("matches", []):
-            category = item.get("category", "").strip().upper()
-            if category not in CATEGORY_DETAILS:
+        for quote in item["quotes"]:
+            quote = quote.strip()
+            if not quote:
                 continue
-            for quote in item.get("quotes", []):
-                quote = (quote or "").strip()
-                if quote:
-                    matches.append(QuoteMatch(category=category, quote=quote))
-        self._log(f"Received {len(matches)} matches.")
+            key = (category, quote.lower())
+            if key in self._global_quote_set or key in pending:
+                continue
+            pending.add(key)
+            matches.append(QuoteMatch(category=category, quote=quote))
         return matches
 
     def _apply_highlights(self, document: Document, matches: list[QuoteMatch]) -> int:
-        applied = 0
+        # Drop duplicate (category, quote) pairs up front; the model can emit
+        # the same excerpt under two chunks or categories.
+        seen: set[tuple[str, str]] = set()
+        unique: list[QuoteMatch] = []
         for match in matches:
-            color = CATEGORY_DETAILS[match.category]["color"]
-            if highlight_quote(document, match.quote, color):
-                applied += 1
-        return applied
+            key = (match.category, match.quote.strip().lower())
+            if key in seen:
+                continue
+            seen.add(key)
+            unique.append(match)
+
+        # Route very long quotes through a trigram candidate index so their
+        # bytes are only compared against the few paragraphs that could
+        # plausibly contain them; everything else shares one automaton scan.
+        short_entries: list[tuple[int, QuoteMatch, str]] = []
+        long_entries: list[tuple[int, QuoteMatch, str]] = []
+        for match_index, match in enumerate(unique):
+            normalized = match.quote.strip().lower()
+            if not normalized:
+                continue
+            bucket = long_entries if len(normalized) >= LONG_QUOTE_CHARS else short_entries
+            bucket.append((match_index, match, normalized))
+
+        para_cache = build_paragraph_cache(document)
+        applied: set[int] = set()
+
+        if short_entries:
+            # Every short quote is matched in one pass per paragraph: through
+            # a Hyperscan literal database when the wheel is present, else an
+            # Aho-Corasick automaton. Both see each paragraph's text once.
+            by_text: dict[str, list[tuple[int, QuoteMatch]]] = {}
+            for match_index, match, normalized in short_entries:
+                by_text.setdefault(normalized, []).append((match_index, match))
+            patterns = list(by_text.items())
+
+            if hyperscan is not None:
+                database = hyperscan.Database()
+                database.compile(
+                    expressions=[normalized.encode("utf-8") for normalized, _ in patterns],
+                    ids=list(range(len(patterns))),
+                    elements=len(patterns),
+                    flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH]
+                    * len(patterns),
+                    literal=True,
+                )
+                for paragraph, text_lower in para_cache:
+                    pattern_hits: set[int] = set()
+                    database.scan(
+                        text_lower.encode("utf-8"),
+                        match_event_handler=lambda pat, start, end, flags, ctx: (
+                            pattern_hits.add(pat)
+                        ),
+                    )
+                    for pat in pattern_hits:
+                        for match_index, match in patterns[pat][1]:
+                            apply_paragraph_shading(paragraph, match.category)
+                            applied.add(match_index)
+            else:
+                automaton = ahocorasick.Automaton()
+                for normalized, entries in patterns:
+                    automaton.add_word(normalized, entries)
+                automaton.make_automaton()
+
+                for paragraph, text_lower in para_cache:
+                    hits = {
+                        match_index: match
+                        for _, entries in automaton.iter(text_lower)
+                        for match_index, match in entries
+                    }
+                    for match_index, match in hits.items():
+                        apply_paragraph_shading(paragraph, match.category)
+                        applied.add(match_index)
+
+        if long_entries:
+            trigrams: defaultdict[str, set[int]] = defaultdict(set)
+            for cache_index, (_, text_lower) in enumerate(para_cache):
+                for offset in range(len(text_lower) - 2):
+                    trigrams[text_lower[offset : offset + 3]].add(cache_index)
+
+            # Verify candidates on encoded bytes: bytes.__contains__ runs
+            # CPython's C fast-search without allocating new strings, and the
+            # paragraph text is already lowercased exactly once in the cache.
+            cache_bytes = [text_lower.encode("utf-8") for _, text_lower in para_cache]
+
+            for match_index, match, normalized in long_entries:
+                candidates: set[int] | None = None
+                for offset in range(3):
+                    posting = trigrams.get(normalized[offset : offset + 3])
+                    if not posting:
+                        candidates = set()
+                        break
+                    candidates = posting if candidates is None else candidates & posting
+                normalized_bytes = normalized.encode("utf-8")
+                for cache_index in candidates or ():
+                    if normalized_bytes in cache_bytes[cache_index]:
+                        apply_paragraph_shading(para_cache[cache_index][0], match.category)
+                        applied.add(match_index)
+
+        return len(applied)
 
     # -------------------------------------------------------------- Utils --
     def _log(self, message: str) -> None:
-        self.log.insert(END, f"{message}\n")
-        self.log.see(END)
+        self._log_q.put(message)
+
+    def _drain_log_queue(self) -> None:
+        drained = False
+        while True:
+            try:
+                message = self._log_q.get_nowait()
+            except queue.Empty:
+                break
+            self.log.insert(END, f"{message}\n")
+            drained = True
+        if drained:
+            self.log.see(END)
+        self.root.after(LOG_DRAIN_INTERVAL_MS, self._drain_log_queue)
 
     def _append_legend(self, document: Document) -> None:
         legend_title = document.add_paragraph()
@@ -280,10 +691,10 @@ class TranscriptCoderApp:
             entry = document.add_paragraph()
             entry.add_run(f"{code}. {meta['title']} – ")
             swatch = entry.add_run("example")
-            apply_shading(swatch, meta["color"])
+            apply_shading(swatch, code)
 
     @staticmethod
-    def _build_client() -> AzureOpenAI:
+    def _validate_environment() -> dict[str, str]:
         missing = []
         cleaned: dict[str, str] = {}
         for var in ("AZURE_OPENAI_API_KEY", "AZURE_OPENAI_ENDPOINT", "AZURE_OPENAI_DEPLOYMENT"):
@@ -296,72 +707,175 @@ class TranscriptCoderApp:
             message = "Missing Azure OpenAI environment variables: " + ", ".join(missing)
             raise EnvironmentError(message)
 
-        endpoint = cleaned["AZURE_OPENAI_ENDPOINT"].rstrip("/")
-        if not endpoint.startswith("https://"):
+        cleaned["AZURE_OPENAI_ENDPOINT"] = cleaned["AZURE_OPENAI_ENDPOINT"].rstrip("/")
+        if not cleaned["AZURE_OPENAI_ENDPOINT"].startswith("https://"):
             raise EnvironmentError(
                 "AZURE_OPENAI_ENDPOINT must include the full https URL, e.g. "
                 "https://my-resource.openai.azure.com"
             )
+        return cleaned
 
-        return AzureOpenAI(
+    @staticmethod
+    def _build_client() -> AsyncAzureOpenAI:
+        cleaned = TranscriptCoderApp._validate_environment()
+
+        # The SDK's default pool caps out well below the concurrent fan-out;
+        # a sized keep-alive pool with HTTP/2 multiplexing avoids a fresh TLS
+        # handshake per batched request. The pool options must go on the
+        # transport: AsyncClient ignores limits/http2 when an explicit
+        # transport is passed.
+        http_client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(
+                retries=2,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+                http2=True,
+            ),
+            timeout=httpx.Timeout(60.0),
+        )
+        return AsyncAzureOpenAI(
             api_key=cleaned["AZURE_OPENAI_API_KEY"],
-            azure_endpoint=endpoint,
-            api_version=os.environ.get("AZURE_OPENAI_API_VERSION", "2024-02-15-preview"),
+            azure_endpoint=cleaned["AZURE_OPENAI_ENDPOINT"],
+            # Structured outputs (json_schema) need 2024-08-01-preview or later.
+            api_version=os.environ.get("AZURE_OPENAI_API_VERSION", "2024-08-01-preview"),
+            http_client=http_client,
         )
 
 
 # Helper functions ----------------------------------------------------------
 
 
-def chunk_text(paragraphs: list[str], max_chars: int = 3500) -> list[str]:
+def _is_retryable_error(exc: OpenAIError) -> bool:
+    """Retry rate limits, connection drops/timeouts, and 5xx server errors."""
+
+    if isinstance(exc, (RateLimitError, APIConnectionError)):
+        return True
+    return isinstance(exc, APIStatusError) and exc.status_code >= 500
+
+
+def _retry_delay(exc: OpenAIError, attempt: int) -> float:
+    """Exponential backoff with jitter, honoring Retry-After when sent."""
+
+    delay = min(MAX_RETRY_SLEEP, 2.0**attempt)
+    response = getattr(exc, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                delay = min(MAX_RETRY_SLEEP, float(retry_after))
+            except ValueError:
+                pass
+    return delay + random.random()
+
+
+def paragraph_xml_text(p_element: BaseOxmlElement) -> str:
+    """Collect all <w:t> text under a <w:p> element in one lxml C traversal."""
+
+    return "".join(t.text or "" for t in p_element.iter(_QN_T))
+
+
+def fast_read_paragraphs(path: str) -> Iterator[str]:
+    """Stream paragraph text out of a .docx without building the full tree.
+
+    iterparse emits each <w:p> as its end tag arrives; the element (and any
+    already-consumed siblings) is discarded immediately, so memory stays flat
+    no matter how large word/document.xml is.
+    """
+
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as stream:
+        for _, element in etree.iterparse(stream, tag=_QN_P):
+            # Only direct children of <w:body>: paragraphs nested in tables
+            # or textboxes are invisible to the highlight phase, which works
+            # on document.paragraphs.
+            if element.getparent().tag == _QN_BODY:
+                yield paragraph_xml_text(element)
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+
+def paragraph_text(paragraph: Paragraph) -> str:
+    """Read a paragraph's text without python-docx's per-access run rebuild."""
+
+    return paragraph_xml_text(paragraph._p)
+
+
+def build_paragraph_cache(document: Document) -> list[tuple[Paragraph, str]]:
+    """Pair each non-empty paragraph with its lowercased text, computed once."""
+
+    # Snapshot the property result: document.paragraphs rebuilds its wrapper
+    # list from the XML on every access.
+    paragraphs = document.paragraphs
+    cache: list[tuple[Paragraph, str]] = []
+    for paragraph in paragraphs:
+        text = paragraph_text(paragraph)
+        if text.strip():
+            cache.append((paragraph, text.lower()))
+    return cache
+
+
+def chunk_text(paragraphs: Iterable[str], max_chars: int = 3500) -> Iterator[str]:
     """Yield transcript chunks without splitting paragraphs."""
 
-    chunks: list[str] = []
     buffer: list[str] = []
     current = 0
     for para in paragraphs:
         if current + len(para) + 1 > max_chars and buffer:
-            chunks.append("\n".join(buffer))
+            yield "\n".join(buffer)
             buffer = []
             current = 0
         buffer.append(para)
         current += len(para) + 1
     if buffer:
-        chunks.append("\n".join(buffer))
-    return chunks
+        yield "\n".join(buffer)
 
 
-def apply_shading(run, color_hex: str) -> None:
-    """Apply a pastel shading color to a run using a hex fill value."""
+def apply_shading(run, category: str) -> None:
+    """Apply the category's pastel shading to a run from a prebuilt template."""
 
     rpr = run._element.get_or_add_rPr()
     # Remove any existing highlight elements to avoid layering colors.
-    for child in list(rpr):
-        if child.tag == qn("w:highlight"):
-            rpr.remove(child)
+    for child in rpr.findall(_QN_HIGHLIGHT):
+        rpr.remove(child)
 
-    shd = OxmlElement("w:shd")
-    shd.set(qn("w:val"), "clear")
-    shd.set(qn("w:fill"), color_hex)
-    rpr.append(shd)
+    rpr.append(copy.deepcopy(_SHD_TEMPLATES[category]))
+
+
+def apply_paragraph_shading(paragraph: Paragraph, category: str) -> None:
+    """Shade a whole paragraph with one pPr-level element.
+
+    The highlight criterion colors the entire paragraph, so a single <w:shd>
+    on <w:pPr> replaces one element per run; apply_shading remains for
+    sub-paragraph granularity such as the legend swatches.
+    """
+
+    ppr = paragraph._p.get_or_add_pPr()
+    for child in ppr.findall(_QN_SHD):
+        ppr.remove(child)
+    ppr.append(copy.deepcopy(_SHD_TEMPLATES[category]))
+
+
+def highlight_quote(document: Document, quote: str, category: str) -> bool:
+    """Highlight every paragraph containing the quote. Returns True if applied.
+
+    Convenience wrapper for one-off use; callers with several quotes should
+    build the paragraph cache themselves and use _highlight_quote_in so the
+    document is only walked once.
+    """
 
+    return _highlight_quote_in(build_paragraph_cache(document), quote, category)
 
-def highlight_quote(document: Document, quote: str, color_hex: str) -> bool:
-    """Highlight every paragraph containing the quote. Returns True if applied."""
 
-    normalized = quote.strip()
-    if not normalized:
+def _highlight_quote_in(
+    para_cache: list[tuple[Paragraph, str]], quote: str, category: str
+) -> bool:
+    normalized_lower = quote.strip().lower()
+    if not normalized_lower:
         return False
 
-    normalized_lower = normalized.lower()
     applied = False
-    for paragraph in document.paragraphs:
-        text = paragraph.text.strip()
-        if not text:
-            continue
-        if normalized_lower in text.lower():
-            for run in paragraph.runs:
-                apply_shading(run, color_hex)
+    for paragraph, text_lower in para_cache:
+        if normalized_lower in text_lower:
+            apply_paragraph_shading(paragraph, category)
             applied = True
     return applied
 